@@ -0,0 +1,22 @@
+# Gunicorn settings (loaded automatically from the working directory)
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# A single worker process: job status, the processing pool and the Whisper
+# model all live in memory, so more processes would duplicate the model
+# and split job state between them
+workers = 1
+
+# Threaded worker so large uploads, status streams and API calls are
+# served concurrently instead of blocking each other
+worker_class = 'gthread'
+threads = 32
+
+# Allow slow 200MB uploads to finish
+timeout = 600
+
+# Close the connection after every response. Otherwise Gunicorn reads and
+# discards the rest of a rejected oversized body before the next request
+# on the same connection
+keepalive = 0
@@ -1,12 +1,28 @@
 import os
+import functools
+import gzip
+import hashlib
+import io
+import shutil
 import subprocess
 import json
+import math
+import re
 import tempfile
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, jsonify, request, render_template_string
+import orjson
+from flask import Flask, Response, jsonify, request, send_from_directory, stream_with_context
 from flask_cors import CORS
+from werkzeug.formparser import FormDataParser
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
+from werkzeug.wrappers import Request
 from faster_whisper import WhisperModel
 
 app = Flask(__name__)
@@ -26,13 +42,101 @@ except Exception as e:
 
 # Configure for Railway
 app.config['MAX_CONTENT_LENGTH'] = 200 * 1024 * 1024  # 200MB
-app.config['UPLOAD_FOLDER'] = tempfile.mkdtemp()
+# Fixed location shared by every worker; created with the first job
+app.config['UPLOAD_FOLDER'] = os.environ.get(
+    'UPLOAD_FOLDER', os.path.join(tempfile.gettempdir(), 'podcast-illustrator'))
+
+# Job directories untouched for this long are deleted
+app.config['JOB_RETENTION_HOURS'] = float(os.environ.get('JOB_RETENTION_HOURS', 24))
+
+# Behind nginx, set this to an internal location aliased to UPLOAD_FOLDER
+# (e.g. /_internal) so nginx sends segment files instead of Flask
+app.config['ACCEL_REDIRECT_PREFIX'] = os.environ.get('ACCEL_REDIRECT_PREFIX')
 
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {'mp3', 'wav', 'm4a', 'flac', 'ogg'}
+ALLOWED_EXTENSIONS = frozenset({'mp3', 'wav', 'm4a', 'flac', 'ogg'})
+
+# Background pool for audio processing jobs. FFmpeg runs in its own process
+# and Faster-Whisper releases the GIL, so threads are enough to keep
+# request workers free while a job runs.
+PROCESSING_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+# Shared by every job so concurrent jobs together never run more FFmpeg
+# processes than there are cores
+FFMPEG_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
+# Latest status of each job, keyed by job ID and stored as serialized JSON.
+# The condition is notified on every update so status streams can wake up.
+JOB_STATUS = {}
+JOB_STATUS_CONDITION = threading.Condition()
+
+# Only these states are also written to status.json in the job directory,
+# so they survive a restart; progress ticks stay in memory
+PERSISTED_STATUSES = frozenset({'uploaded', 'completed', 'failed'})
+
+# Each open status stream holds a Gunicorn thread, so cap them and keep
+# the remaining threads for uploads and API calls; refused clients poll
+MAX_STATUS_STREAMS = 16
+STATUS_STREAM_SLOTS = threading.BoundedSemaphore(MAX_STATUS_STREAMS)
+
+# Streams are closed after this long and the browser reconnects, so one
+# client cannot hold a slot for the whole job
+STATUS_STREAM_MAX_DURATION = 10 * 60  # 10 minutes
+
+# How often old job directories are swept. Only names made by
+# create_job_dir are touched, in case UPLOAD_FOLDER is shared (e.g. /tmp)
+JOB_SWEEP_INTERVAL = 60 * 60  # 1 hour
+JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+JOB_SWEEP_STARTED = False
+JOB_SWEEP_LOCK = threading.Lock()
+
+# Uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Retried uploads reuse the same names, so cache the sanitized results
+cached_secure_filename = functools.lru_cache(maxsize=1024)(secure_filename)
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    _, dot, ext = filename.rpartition('.')
+    return bool(dot) and ext.lower() in ALLOWED_EXTENSIONS
+
+def upload_filename(original_filename):
+    """Sanitize an allowed upload name without losing its extension"""
+    filename = cached_secure_filename(original_filename)
+    if not allowed_file(filename):
+        # secure_filename drops non-ASCII characters, so a name like
+        # '播.mp3' would come back as 'mp3'
+        filename = f"upload.{original_filename.rpartition('.')[2].lower()}"
+    return filename
+
+def create_job_dir():
+    """Generate a job ID and create its job directory"""
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    start_job_sweep()
+    return job_id, job_dir
+
+def save_stream(stream, file_path):
+    """Copy a request stream to disk chunk by chunk, returning the number of bytes written"""
+    total = 0
+    with open(file_path, 'wb') as f:
+        while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+            f.write(chunk)
+            total += len(chunk)
+    return total
+
+class CountingFile(io.FileIO):
+    """File opened for writing that counts the bytes written to it"""
+    
+    def __init__(self, file_path):
+        super().__init__(file_path, 'wb')
+        self.bytes_written = 0
+    
+    def write(self, data):
+        written = super().write(data)
+        self.bytes_written += written
+        return written
 
 def update_job_status(job_dir, status, progress, message=""):
     """Update job status"""
@@ -43,37 +147,213 @@ def update_job_status(job_dir, status, progress, message=""):
         'timestamp': datetime.now().isoformat()
     }
     
+    status_bytes = orjson.dumps(status_data, option=orjson.OPT_INDENT_2)
+    
+    with JOB_STATUS_CONDITION:
+        JOB_STATUS[os.path.basename(job_dir)] = status_bytes
+        JOB_STATUS_CONDITION.notify_all()
+    
+    if status not in PERSISTED_STATUSES:
+        return
+    
     status_file = os.path.join(job_dir, 'status.json')
-    with open(status_file, 'w') as f:
-        json.dump(status_data, f, indent=2)
+    tmp_file = status_file + '.tmp'
+    with open(tmp_file, 'wb') as f:
+        f.write(status_bytes)
+    
+    # Swap in the new file atomically so pollers never read a partial write
+    os.replace(tmp_file, status_file)
+
+def read_job_status(job_id):
+    """Get the serialized status of a job, or None if the job is unknown"""
+    with JOB_STATUS_CONDITION:
+        status_bytes = JOB_STATUS.get(job_id)
+    if status_bytes is not None:
+        return status_bytes
+    
+    # Not tracked by this process (e.g. after a restart)
+    status_file = os.path.join(app.config['UPLOAD_FOLDER'], job_id, 'status.json')
+    try:
+        with open(status_file, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def job_in_progress(job_id):
+    """Check whether this process holds a non-persisted status for the job"""
+    with JOB_STATUS_CONDITION:
+        status_bytes = JOB_STATUS.get(job_id)
+    return status_bytes is not None and orjson.loads(status_bytes)['status'] not in PERSISTED_STATUSES
+
+def sweep_old_jobs():
+    """Delete expired job directories, then schedule the next sweep"""
+    cutoff = time.time() - app.config['JOB_RETENTION_HOURS'] * 60 * 60
+    
+    try:
+        # Persisted status updates touch the job directory, so its mtime is
+        # the last activity; jobs still processing here are never swept
+        with os.scandir(app.config['UPLOAD_FOLDER']) as entries:
+            for entry in entries:
+                if (JOB_ID_PATTERN.fullmatch(entry.name) and entry.is_dir()
+                        and entry.stat().st_mtime < cutoff
+                        and not job_in_progress(entry.name)):
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    with JOB_STATUS_CONDITION:
+                        JOB_STATUS.pop(entry.name, None)
+    except FileNotFoundError:
+        pass  # No uploads yet
+    except Exception as e:
+        print(f"ERROR sweeping old jobs: {e}")
+    
+    schedule_job_sweep(JOB_SWEEP_INTERVAL)
+
+def schedule_job_sweep(delay):
+    """Run sweep_old_jobs on a daemon timer thread after the given delay"""
+    timer = threading.Timer(delay, sweep_old_jobs)
+    timer.daemon = True
+    timer.start()
+
+def start_job_sweep():
+    """Start the periodic cleanup of old jobs when the first job is created"""
+    global JOB_SWEEP_STARTED
+    with JOB_SWEEP_LOCK:
+        if JOB_SWEEP_STARTED:
+            return
+        JOB_SWEEP_STARTED = True
+    schedule_job_sweep(0)
+
+def job_status_events(job_id, timeout=5):
+    """Yield a server-sent event whenever the job status changes, until it finishes"""
+    last_sent = None
+    deadline = time.monotonic() + STATUS_STREAM_MAX_DURATION
+    
+    while time.monotonic() < deadline:
+        status_bytes = read_job_status(job_id)
+        if status_bytes is None:
+            return
+        
+        if status_bytes != last_sent:
+            last_sent = status_bytes
+            # Multi-line JSON is sent as one "data:" line per line of text
+            yield b'data: ' + status_bytes.replace(b'\n', b'\ndata: ') + b'\n\n'
+            if orjson.loads(status_bytes)['status'] in ('completed', 'failed'):
+                return
+        else:
+            # Comment line keeps proxies from closing an idle connection
+            yield b': keepalive\n\n'
+        
+        # Wake up on the next update; the timeout also picks up status
+        # written by other processes, which never notify this one
+        with JOB_STATUS_CONDITION:
+            JOB_STATUS_CONDITION.wait_for(
+                lambda: job_id in JOB_STATUS and JOB_STATUS[job_id] != last_sent,
+                timeout=timeout)
+
+def probe_audio(audio_file):
+    """Read the first audio stream's properties and the duration using FFprobe"""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'a:0',
+        '-show_entries', 'stream=codec_name,sample_rate,channels,bit_rate:format=duration',
+        '-of', 'json',
+        audio_file
+    ]
+    
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout)
+    except (subprocess.CalledProcessError, ValueError):
+        return {}
+    
+    streams = probe.get('streams', [])
+    info = dict(streams[0]) if streams else {}
+    try:
+        info['duration'] = float(probe['format']['duration'])
+    except (KeyError, TypeError, ValueError):
+        pass  # Unknown duration (e.g. a stream without a length header)
+    return info
+
+def run_ffmpeg(cmd):
+    """Run an FFmpeg command, raising CalledProcessError with stderr on failure"""
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
 
 def segment_audio(job_dir, audio_file, segment_duration=600):
     """Split audio into segments using FFmpeg"""
     segments_dir = os.path.join(job_dir, 'segments')
     os.makedirs(segments_dir, exist_ok=True)
+    segment_pattern = os.path.join(segments_dir, 'segment_%03d.mp3')
     
     try:
         update_job_status(job_dir, 'processing', 10, 'Segmenting audio file...')
         
-        # Use the working FFmpeg command we tested
-        cmd = [
-            'ffmpeg', '-i', audio_file,
-            '-f', 'segment',
-            '-segment_time', str(segment_duration),
-            '-c:a', 'libmp3lame',  # Use MP3 encoder
-            '-b:a', '128k',        # Set bitrate
-            '-ar', '44100',        # Set sample rate
-            '-ac', '2',            # Set to stereo
-            os.path.join(segments_dir, 'segment_%03d.mp3')
-        ]
+        info = probe_audio(audio_file)
+        copy_stream = info.get('codec_name') == 'mp3'
         
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        if copy_stream:
+            # Already MP3, so split the stream without decoding it
+            codec_args = [
+                '-vn',                 # Drop embedded cover art
+                '-c:a', 'copy'
+            ]
+        else:
+            codec_args = [
+                '-c:a', 'libmp3lame',  # Use MP3 encoder
+                '-b:a', '128k',        # Set bitrate
+                '-ar', '44100',        # Set sample rate
+                '-ac', '2'             # Set to stereo
+            ]
+        
+        # FFmpeg reads the upload by path rather than from a pipe on stdin:
+        # uploads are written straight into the job directory, so there is no
+        # copy to save, and piped input can neither seek (-ss) nor read
+        # formats that keep their index at the end of the file (e.g. m4a)
+        duration = info.get('duration')
+        if duration and not copy_stream:
+            # Cut every segment in its own FFmpeg process so they run in
+            # parallel; -ss before -i seeks in the input instead of decoding
+            # and discarding everything before the segment start.
+            # The duration is only an estimate for some files (e.g. VBR MP3
+            # without a Xing header), so the last segment runs on to EOF
+            count = math.ceil(duration / segment_duration)
+            cmds = [
+                [
+                    'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+                    '-ss', str(index * segment_duration),
+                    *(['-t', str(segment_duration)] if index < count - 1 else []),
+                    '-i', audio_file,
+                    *codec_args,
+                    segment_pattern % index
+                ]
+                for index in range(count)
+            ]
+            list(FFMPEG_EXECUTOR.map(run_ffmpeg, cmds))
+            
+            # An overestimated duration can start the last segment past EOF
+            last_segment = segment_pattern % (count - 1)
+            if count > 1 and not probe_audio(last_segment).get('duration'):
+                os.remove(last_segment)
+        else:
+            # Stream copy is bound by disk I/O and gains little from parallel
+            # processes, and an unknown length cannot be split up front, so
+            # let the segment muxer split in a single pass
+            cmd = [
+                'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+                '-i', audio_file,
+                '-threads', '0',       # Let FFmpeg use all cores
+                '-f', 'segment',
+                '-segment_time', str(segment_duration),
+                *codec_args,
+                *(['-reset_timestamps', '1'] if copy_stream else []),  # Start each segment at zero
+                segment_pattern
+            ]
+            FFMPEG_EXECUTOR.submit(run_ffmpeg, cmd).result()
         
-        # Get list of created segments
-        segment_files = []
-        for filename in sorted(os.listdir(segments_dir)):
-            if filename.startswith('segment_') and filename.endswith('.mp3'):
-                segment_files.append(os.path.join(segments_dir, filename))
+        # Get list of created segments (zero-padded names sort in order)
+        with os.scandir(segments_dir) as entries:
+            segment_files = sorted(
+                entry.path for entry in entries
+                if entry.name.startswith('segment_') and entry.name.endswith('.mp3')
+            )
         
         update_job_status(job_dir, 'processing', 30, f'Created {len(segment_files)} audio segments')
         return segment_files
@@ -152,372 +432,111 @@ def transcribe_audio_segments(job_dir, segment_files):
         update_job_status(job_dir, 'failed', 0, error_msg)
         raise Exception(error_msg)
 
-# Frontend HTML template
-FRONTEND_HTML = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>🎙️ Podcast Illustrator</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { 
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            padding: 20px;
-        }
-        .container {
-            background: white;
-            border-radius: 20px;
-            padding: 40px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            max-width: 600px;
-            width: 100%;
-            text-align: center;
-        }
-        h1 { color: #333; margin-bottom: 10px; font-size: 2.5em; }
-        .subtitle { color: #666; margin-bottom: 30px; font-size: 1.1em; }
-        .upload-area {
-            border: 3px dashed #ddd;
-            border-radius: 15px;
-            padding: 40px;
-            margin: 30px 0;
-            background: #f9f9f9;
-            transition: all 0.3s ease;
-        }
-        .upload-area:hover { border-color: #667eea; background: #f0f4ff; }
-        .upload-area.dragover { border-color: #667eea; background: #e8f2ff; }
-        input[type="file"] { 
-            width: 100%; 
-            padding: 15px; 
-            border: 2px solid #ddd; 
-            border-radius: 10px; 
-            font-size: 16px;
-            margin: 10px 0;
-        }
-        input[type="text"] { 
-            width: 300px; 
-            padding: 10px; 
-            border: 2px solid #ddd; 
-            border-radius: 8px; 
-            font-size: 14px;
-            margin: 0 10px;
-        }
-        button {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            padding: 15px 30px;
-            border-radius: 10px;
-            font-size: 18px;
-            cursor: pointer;
-            transition: transform 0.2s;
-            margin: 10px;
-        }
-        button:hover { transform: translateY(-2px); }
-        button:disabled { opacity: 0.6; cursor: not-allowed; transform: none; }
-        .result {
-            margin-top: 20px;
-            padding: 15px;
-            border-radius: 10px;
-            text-align: left;
-        }
-        .success { background: #d4edda; border: 1px solid #c3e6cb; color: #155724; }
-        .error { background: #f8d7da; border: 1px solid #f5c6cb; color: #721c24; }
-        .info { background: #d1ecf1; border: 1px solid #bee5eb; color: #0c5460; }
-        .progress { width: 100%; height: 20px; background: #f0f0f0; border-radius: 10px; overflow: hidden; margin: 10px 0; }
-        .progress-bar { height: 100%; background: #667eea; transition: width 0.3s; }
-        .features {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            margin: 30px 0;
-        }
-        .feature {
-            background: #f8f9fa;
-            padding: 20px;
-            border-radius: 10px;
-            text-align: left;
-        }
-        .feature h3 { color: #667eea; margin-bottom: 10px; }
-        .status-section { margin-top: 30px; padding: 20px; background: #f8f9fa; border-radius: 10px; }
-        .badge { background: #28a745; color: white; padding: 5px 10px; border-radius: 5px; font-size: 0.8em; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🎙️ Podcast Illustrator</h1>
-        <p class="subtitle">Transform your podcasts into illustrated videos with AI</p>
-        <p><span class="badge">✨ 100% FREE - Faster-Whisper</span></p>
-        
-        <!-- Debug test button -->
-        <button onclick="alert('JavaScript is working!')" style="margin: 10px; padding: 5px 10px; font-size: 12px;">Test JavaScript</button>
-        
-        <div class="features">
-            <div class="feature">
-                <h3>🎵 Audio Processing</h3>
-                <p>FFmpeg-powered audio segmentation and conversion</p>
-            </div>
-            <div class="feature">
-                <h3>🤖 AI Transcription</h3>
-                <p>Faster-Whisper model - completely free!</p>
-            </div>
-            <div class="feature">
-                <h3>🎨 Visual Generation</h3>
-                <p>AI-generated images synchronized with audio</p>
-            </div>
-        </div>
-
-        <div class="upload-area" id="uploadArea">
-            <h3>📁 Upload Your Podcast</h3>
-            <p>Select your audio file and click Upload & Process</p>
-            <div style="margin: 20px 0;">
-                <input type="file" id="audioFile" accept="audio/*" style="display: block; margin: 10px auto;" />
-            </div>
-            <button onclick="uploadFile()" id="uploadBtn" style="display: block; margin: 10px auto;">Upload & Process</button>
-        </div>
-
-        <div id="result"></div>
-        
-        <div class="status-section">
-            <h3>🔍 Processing Status</h3>
-            <input type="text" id="jobId" placeholder="Enter Job ID" />
-            <button onclick="checkStatus()">Check Status</button>
-            <div id="statusResult"></div>
-        </div>
-    </div>
-
-    <script>
-        const API_BASE = window.location.origin;
-
-        function showResult(elementId, message, type = 'info') {
-            const element = document.getElementById(elementId);
-            element.innerHTML = `<div class="result ${type}">${message}</div>`;
-        }
-
-        function showProgress(elementId, progress) {
-            const element = document.getElementById(elementId);
-            element.innerHTML = `
-                <div class="result info">
-                    <div>Processing... ${progress}%</div>
-                    <div class="progress">
-                        <div class="progress-bar" style="width: ${progress}%"></div>
-                    </div>
-                </div>
-            `;
-        }
-
-        async function uploadFile() {
-            alert('Button clicked!'); // Debug test
-            
-            const fileInput = document.getElementById('audioFile');
-            const uploadBtn = document.getElementById('uploadBtn');
-            
-            alert('Got elements: ' + (fileInput ? 'YES' : 'NO')); // Debug test
-            
-            if (!fileInput.files[0]) {
-                alert('No file selected'); // Debug test
-                showResult('result', 'Please select an audio file first.', 'error');
-                return;
-            }
-            
-            alert('File selected: ' + fileInput.files[0].name); // Debug test
+# Frontend page, kept as bytes so it never needs encoding
+FRONTEND_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend.html')
+with open(FRONTEND_PATH, 'rb') as f:
+    FRONTEND_HTML = f.read()
 
-            const file = fileInput.files[0];
-            const fileSizeMB = (file.size / 1024 / 1024).toFixed(2);
-            
-            if (file.size > 200 * 1024 * 1024) {
-                showResult('result', `File too large (${fileSizeMB}MB). Maximum size is 200MB.`, 'error');
-                return;
-            }
+def minify_css(css):
+    """Remove comments and insignificant whitespace from a stylesheet"""
+    css = re.sub(rb'/\*.*?\*/', b'', css, flags=re.S)
+    css = re.sub(rb'\s+', b' ', css)
+    css = re.sub(rb' ?([{};:,>]) ?', rb'\1', css)
+    return css.replace(b';}', b'}').strip()
 
-            const formData = new FormData();
-            formData.append('audio', file);
-            
-            uploadBtn.disabled = true;
-            uploadBtn.textContent = 'Uploading...';
-            
-            try {
-                showResult('result', `Uploading ${file.name} (${fileSizeMB}MB)...`, 'info');
-                
-                const response = await fetch(`${API_BASE}/api/upload`, {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                const data = await response.json();
-                
-                if (response.ok) {
-                    showResult('result', `
-                        <strong>✅ Upload Successful!</strong><br>
-                        <strong>Job ID:</strong> <code>${data.job_id}</code><br>
-                        <strong>Filename:</strong> ${data.filename}<br>
-                        <strong>File Size:</strong> ${(data.file_size / 1024 / 1024).toFixed(2)} MB<br>
-                        <strong>Status:</strong> ${data.status}
-                    `, 'success');
-                    
-                    // Auto-fill job ID and start processing
-                    document.getElementById('jobId').value = data.job_id;
-                    setTimeout(() => startProcessing(data.job_id), 1000);
-                } else {
-                    showResult('result', `Upload failed: ${data.error || 'Unknown error'}`, 'error');
-                }
-            } catch (error) {
-                showResult('result', `Upload error: ${error.message}`, 'error');
-            } finally {
-                uploadBtn.disabled = false;
-                uploadBtn.textContent = 'Upload & Process';
-            }
-        }
-
-        async function startProcessing(jobId) {
-            try {
-                const response = await fetch(`${API_BASE}/api/process/${jobId}`, {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' }
-                });
-                
-                const data = await response.json();
-                
-                if (response.ok) {
-                    showResult('result', `
-                        <strong>🚀 Processing Started!</strong><br>
-                        Job ID: <code>${jobId}</code><br>
-                        Status: ${data.status}<br>
-                        <em>Note: Local transcription may take a few minutes...</em>
-                    `, 'success');
-                    
-                    // Start monitoring
-                    monitorProgress(jobId);
-                } else {
-                    showResult('result', `Processing failed: ${data.error || 'Unknown error'}`, 'error');
-                }
-            } catch (error) {
-                showResult('result', `Processing error: ${error.message}`, 'error');
-            }
-        }
+def minify_js(js):
+    """Remove indentation, blank lines and full-line // comments from a script"""
+    lines = []
+    in_template = False
+    for line in js.splitlines():
+        line = line.strip()
+        # Lines inside a template literal are page content, never comments
+        if not in_template and (not line or line.startswith(b'//')):
+            continue
+        lines.append(line)
+        if (line.count(b'`') - line.count(b'\\`')) % 2:
+            in_template = not in_template
+    
+    # Line breaks are kept so the script still relies on the same semicolon insertion
+    return b'\n'.join(lines)
 
-        async function checkStatus() {
-            const jobId = document.getElementById('jobId').value.trim();
-            
-            if (!jobId) {
-                showResult('statusResult', 'Please enter a Job ID.', 'error');
-                return;
-            }
-            
-            try {
-                const response = await fetch(`${API_BASE}/api/status/${jobId}`);
-                const data = await response.json();
-                
-                if (response.ok) {
-                    const progress = data.progress || 0;
-                    if (data.status === 'processing') {
-                        showProgress('statusResult', progress);
-                    } else {
-                        showResult('statusResult', `
-                            <strong>Status:</strong> ${data.status}<br>
-                            <strong>Progress:</strong> ${progress}%<br>
-                            <strong>Message:</strong> ${data.message}<br>
-                            <strong>Timestamp:</strong> ${data.timestamp}
-                        `, data.status === 'completed' ? 'success' : data.status === 'failed' ? 'error' : 'info');
-                    }
-                } else {
-                    showResult('statusResult', `Status check failed: ${data.error || 'Job not found'}`, 'error');
-                }
-            } catch (error) {
-                showResult('statusResult', `Status error: ${error.message}`, 'error');
-            }
-        }
-
-        async function monitorProgress(jobId) {
-            const checkProgress = async () => {
-                try {
-                    const response = await fetch(`${API_BASE}/api/status/${jobId}`);
-                    const data = await response.json();
-                    
-                    if (response.ok) {
-                        const progress = data.progress || 0;
-                        showProgress('statusResult', progress);
-                        
-                        if (data.status === 'completed') {
-                            // Fetch the transcript
-                            try {
-                                const transcriptResponse = await fetch(`${API_BASE}/api/transcript/${jobId}`);
-                                const transcriptData = await transcriptResponse.json();
-                                
-                                if (transcriptResponse.ok) {
-                                    showResult('statusResult', `
-                                        <strong>✅ Processing Complete!</strong><br>
-                                        Job ID: <code>${jobId}</code><br>
-                                        Message: ${data.message}<br><br>
-                                        <strong>📝 Transcript:</strong><br>
-                                        <div style="max-height: 300px; overflow-y: auto; background: #f8f9fa; padding: 10px; border-radius: 5px; margin-top: 10px; text-align: left;">
-                                            ${transcriptData.full_text.replace(/\n/g, '<br>')}
-                                        </div>
-                                        <br>
-                                        <button onclick="downloadTranscript('${jobId}')">Download Transcript</button>
-                                    `, 'success');
-                                } else {
-                                    showResult('statusResult', `
-                                        <strong>✅ Processing Complete!</strong><br>
-                                        Job ID: <code>${jobId}</code><br>
-                                        Message: ${data.message}
-                                    `, 'success');
-                                }
-                            } catch (error) {
-                                showResult('statusResult', `
-                                    <strong>✅ Processing Complete!</strong><br>
-                                    Job ID: <code>${jobId}</code><br>
-                                    Message: ${data.message}
-                                `, 'success');
-                            }
-                        } else if (data.status === 'failed') {
-                            showResult('statusResult', `❌ Processing failed: ${data.message}`, 'error');
-                        } else if (data.status === 'processing') {
-                            setTimeout(checkProgress, 3000); // Check again in 3 seconds
-                        }
-                    }
-                } catch (error) {
-                    console.error('Progress monitoring error:', error);
-                }
-            };
-            
-            checkProgress();
-        }
+def minify_markup(html):
+    """Remove HTML comments, indentation and blank lines, and minify inline styles"""
+    html = re.sub(rb'<!--.*?-->', b'', html, flags=re.S)
+    html = re.sub(rb'(?<=<style>).*?(?=</style>)', lambda m: minify_css(m.group()), html, flags=re.S)
+    lines = (line.strip() for line in html.splitlines())
+    return b'\n'.join(line for line in lines if line)
 
-        async function downloadTranscript(jobId) {
-            try {
-                const response = await fetch(`${API_BASE}/api/transcript/${jobId}`);
-                const data = await response.json();
-                
-                if (response.ok) {
-                    const blob = new Blob([data.full_text], { type: 'text/plain' });
-                    const url = window.URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = url;
-                    a.download = `transcript_${jobId}.txt`;
-                    document.body.appendChild(a);
-                    a.click();
-                    window.URL.revokeObjectURL(url);
-                    document.body.removeChild(a);
-                }
-            } catch (error) {
-                alert('Failed to download transcript: ' + error.message);
-            }
-        }
-    </script>
-</body>
-</html>
-"""
+def minify_frontend(html):
+    """Shrink the frontend page, treating <script> blocks as JavaScript and the rest as markup"""
+    # With a capturing group, the script bodies land at the odd indices
+    chunks = re.split(rb'(?<=<script>)(.*?)(?=</script>)', html, flags=re.S)
+    return b'\n'.join(
+        minify_js(chunk) if index % 2 else minify_markup(chunk)
+        for index, chunk in enumerate(chunks)
+    )
+
+# The frontend has no template variables, so minify and compress it once
+# at startup and serve the same bytes on every request
+FRONTEND_BYTES = minify_frontend(FRONTEND_HTML)
+FRONTEND_ETAG = hashlib.md5(FRONTEND_BYTES).hexdigest()
+
+def frontend_variant(body, etag, content_encoding=None):
+    """Build the cached body, ETag and headers for one encoding of the frontend"""
+    headers = {
+        'Cache-Control': 'public, max-age=3600',
+        'ETag': f'"{etag}"',
+        'Vary': 'Accept-Encoding'
+    }
+    if content_encoding:
+        headers['Content-Encoding'] = content_encoding
+    return body, etag, headers
+
+FRONTEND_VARIANTS = {
+    'identity': frontend_variant(FRONTEND_BYTES, FRONTEND_ETAG),
+    'gzip': frontend_variant(gzip.compress(FRONTEND_BYTES, compresslevel=9, mtime=0),
+                             f'{FRONTEND_ETAG}-gzip', 'gzip')
+}
 
-@app.route('/')
-def home():
-    return render_template_string(FRONTEND_HTML)
+@app.before_request
+def reject_oversized_requests():
+    """Refuse bodies larger than MAX_CONTENT_LENGTH before reading any of them"""
+    # Gunicorn only skips draining the rest of the body because
+    # gunicorn.conf.py turns off keep-alive
+    content_length = request.content_length
+    if content_length is not None and content_length > app.config['MAX_CONTENT_LENGTH']:
+        raise RequestEntityTooLarge()
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    # Also raised mid-stream when a chunked upload passes the limit
+    limit = app.config['MAX_CONTENT_LENGTH']
+    if limit >= 1024 * 1024:
+        max_size = f'{limit / (1024 * 1024):.4g}MB'
+    else:
+        max_size = f'{limit} bytes'
+    return jsonify({'error': f'File too large. Maximum size is {max_size}.'}), 413
+
+def home(environ, start_response):
+    """WSGI app serving the cached frontend page"""
+    page_request = Request(environ)
+    encoding = 'gzip' if page_request.accept_encodings['gzip'] else 'identity'
+    body, etag, headers = FRONTEND_VARIANTS[encoding]
+    if etag in page_request.if_none_match:
+        response = Response(status=304, headers=headers)
+    else:
+        response = Response(body, mimetype='text/html', headers=headers)
+    return response(environ, start_response)
+
+def serve_frontend(wsgi_app):
+    """Answer page loads before Flask dispatches, so only /api/* reaches the app"""
+    def app_with_frontend(environ, start_response):
+        if environ.get('PATH_INFO') in ('', '/') and environ['REQUEST_METHOD'] in ('GET', 'HEAD'):
+            return home(environ, start_response)
+        return wsgi_app(environ, start_response)
+    return app_with_frontend
+
+app.wsgi_app = serve_frontend(app.wsgi_app)
 
 @app.route('/api/health')
 def health():
@@ -529,41 +548,98 @@ def health():
         'message': 'Audio processing and FREE Faster-Whisper transcription enabled!'
     })
 
+def upload_complete(job_id, job_dir, filename, file_size):
+    """Initialize job status and build the upload response"""
+    update_job_status(job_dir, 'uploaded', 0, 'File uploaded successfully')
+    
+    return jsonify({
+        'job_id': job_id,
+        'filename': filename,
+        'file_size': file_size,
+        'status': 'uploaded',
+        'message': 'File uploaded successfully! Ready for processing.'
+    })
+
 @app.route('/api/upload', methods=['POST'])
 def upload():
-    if 'audio' not in request.files:
+    if request.mimetype != 'multipart/form-data':
+        return jsonify({'error': 'No audio file provided'}), 400
+    
+    job_id, job_dir = create_job_dir()
+    
+    parts = []
+    
+    def stream_to_job_dir(total_content_length, content_type, filename, content_length=None):
+        # Write file parts straight into the job directory so Werkzeug
+        # never buffers or spools the upload anywhere else first,
+        # and count bytes as they arrive instead of stat-ing the file afterwards.
+        # Parts get internal names; only the audio part is kept afterwards.
+        part = CountingFile(os.path.join(job_dir, f'part_{len(parts)}'))
+        parts.append(part)
+        return part
+    
+    parser = FormDataParser(stream_factory=stream_to_job_dir,
+                            max_form_memory_size=request.max_form_memory_size,
+                            max_content_length=request.max_content_length,
+                            max_form_parts=request.max_form_parts)
+    try:
+        _, _, files = parser.parse(request.stream, request.mimetype,
+                                   request.content_length, request.mimetype_params)
+    except Exception:
+        for part in parts:
+            part.close()
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    
+    file = files.get('audio')
+    for part in parts:
+        part.close()
+        if file is None or part is not file.stream:
+            os.remove(part.name)
+    
+    if file is None:
+        shutil.rmtree(job_dir, ignore_errors=True)
         return jsonify({'error': 'No audio file provided'}), 400
     
-    file = request.files['audio']
     if file.filename == '':
+        shutil.rmtree(job_dir, ignore_errors=True)
         return jsonify({'error': 'No file selected'}), 400
     
     if not allowed_file(file.filename):
+        shutil.rmtree(job_dir, ignore_errors=True)
         return jsonify({'error': 'Invalid file type. Supported: mp3, wav, m4a, flac, ogg'}), 400
     
-    # Generate job ID and create job directory
-    job_id = str(uuid.uuid4())
-    job_dir = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
-    os.makedirs(job_dir, exist_ok=True)
+    filename = upload_filename(file.filename)
+    os.replace(file.stream.name, os.path.join(job_dir, filename))
+    
+    return upload_complete(job_id, job_dir, filename, file.stream.bytes_written)
+
+@app.route('/api/upload/raw', methods=['POST'])
+def upload_raw():
+    """Upload the audio file as the raw request body, named by Content-Disposition"""
+    _, options = parse_options_header(request.headers.get('Content-Disposition', ''))
+    original_filename = options.get('filename', '')
     
-    # Save uploaded file
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(job_dir, filename)
-    file.save(file_path)
+    if original_filename == '':
+        return jsonify({'error': 'No file selected'}), 400
     
-    # Get file size
-    file_size = os.path.getsize(file_path)
+    if not allowed_file(original_filename):
+        return jsonify({'error': 'Invalid file type. Supported: mp3, wav, m4a, flac, ogg'}), 400
     
-    # Initialize job status
-    update_job_status(job_dir, 'uploaded', 0, 'File uploaded successfully')
+    job_id, job_dir = create_job_dir()
+    filename = upload_filename(original_filename)
     
-    return jsonify({
-        'job_id': job_id,
-        'filename': filename,
-        'file_size': file_size,
-        'status': 'uploaded',
-        'message': 'File uploaded successfully! Ready for processing.'
-    })
+    try:
+        file_size = save_stream(request.stream, os.path.join(job_dir, filename))
+    except Exception:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    
+    if file_size == 0:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return jsonify({'error': 'No file selected'}), 400
+    
+    return upload_complete(job_id, job_dir, filename, file_size)
 
 @app.route('/api/process/<job_id>', methods=['POST'])
 def process_audio(job_id):
@@ -576,16 +652,13 @@ def process_audio(job_id):
         # Find the uploaded audio file
         audio_file = None
         for filename in os.listdir(job_dir):
-            if filename.lower().endswith(('.mp3', '.wav', '.m4a', '.flac', '.ogg')):
+            if allowed_file(filename):
                 audio_file = os.path.join(job_dir, filename)
                 break
         
         if not audio_file:
             return jsonify({'error': 'No audio file found'}), 400
         
-        # Start processing in background using subprocess
-        import threading
-        
         def process_in_background():
             try:
                 # Step 1: Segment audio
@@ -600,34 +673,68 @@ def process_audio(job_id):
             except Exception as e:
                 update_job_status(job_dir, 'failed', 0, str(e))
         
-        # Start background thread
-        thread = threading.Thread(target=process_in_background)
-        thread.daemon = True
-        thread.start()
+        # Hand the job to the processing pool and return immediately
+        update_job_status(job_dir, 'processing', 0, 'Queued for processing...')
+        PROCESSING_EXECUTOR.submit(process_in_background)
         
         return jsonify({
             'job_id': job_id,
             'status': 'processing',
             'message': 'Audio processing started in background'
-        })
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/status/<job_id>')
 def get_status(job_id):
-    job_dir = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
-    status_file = os.path.join(job_dir, 'status.json')
-    
-    if not os.path.exists(status_file):
-        return jsonify({'error': 'Job not found'}), 404
-    
     try:
-        with open(status_file, 'r') as f:
-            status_data = json.load(f)
-        return jsonify(status_data)
+        status_bytes = read_job_status(job_id)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    
+    if status_bytes is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # The status is already JSON, so send it as-is
+    return Response(status_bytes, mimetype='application/json')
+
+@app.route('/api/status/<job_id>/stream')
+def stream_status(job_id):
+    """Stream status updates for a job as server-sent events"""
+    if read_job_status(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if not STATUS_STREAM_SLOTS.acquire(blocking=False):
+        return jsonify({'error': 'Too many status streams, poll /api/status instead'}), 503
+    
+    response = Response(stream_with_context(job_status_events(job_id)),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(STATUS_STREAM_SLOTS.release)
+    return response
+
+@app.route('/api/segments/<job_id>/<name>')
+def get_segment(job_id, name):
+    """Download one audio segment of a job"""
+    segments_dir = safe_join(app.config['UPLOAD_FOLDER'], job_id, 'segments')
+    
+    if segments_dir is None or not os.path.isdir(segments_dir):
+        return jsonify({'error': 'Job not found'}), 404
+    
+    segment_file = safe_join(segments_dir, name)
+    if segment_file is None or not os.path.isfile(segment_file):
+        return jsonify({'error': 'Segment not found'}), 404
+    
+    accel_prefix = app.config['ACCEL_REDIRECT_PREFIX']
+    if accel_prefix:
+        # Let nginx stream the file; Flask only returns the headers
+        return Response(mimetype='audio/mpeg', headers={
+            'X-Accel-Redirect': f"{accel_prefix.rstrip('/')}/{job_id}/segments/{name}"
+        })
+    
+    # Served through the WSGI file wrapper, which uses sendfile() when available
+    return send_from_directory(segments_dir, name, conditional=True, etag=True)
 
 @app.route('/api/transcript/<job_id>')
 def get_transcript(job_id):
@@ -661,6 +768,7 @@ def get_transcript(job_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Local development only; deployments run under Gunicorn (see gunicorn.conf.py)
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,45 @@
+import importlib.util
+import io
+import os
+from urllib.parse import quote
+
+import pytest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'main-working-version.py')
+
+spec = importlib.util.spec_from_file_location('main_working_version', APP_PATH)
+main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(main)
+
+@pytest.fixture
+def client(tmp_path):
+    main.app.config['UPLOAD_FOLDER'] = str(tmp_path)
+    return main.app.test_client()
+
+def upload_raw(client, filename, body=b'audio'):
+    """POST a raw upload named the way the frontend names it"""
+    # quote(safe='') also escapes ' ( ) * !, matching the frontend's encoding
+    return client.post('/api/upload/raw', data=body, headers={
+        'Content-Disposition': f"attachment; filename*=UTF-8''{quote(filename, safe='')}"
+    })
+
+def test_raw_upload_keeps_parentheses_in_filename(client):
+    response = upload_raw(client, 'Episode 12 (final).mp3')
+    assert response.status_code == 200
+    assert response.json['filename'] == 'Episode_12_final.mp3'
+
+def test_raw_upload_keeps_apostrophe_in_filename(client):
+    response = upload_raw(client, "Host's cut.mp3")
+    assert response.status_code == 200
+    assert response.json['filename'] == 'Hosts_cut.mp3'
+
+def test_raw_upload_keeps_extension_of_non_ascii_filename(client):
+    response = upload_raw(client, '播.mp3')
+    assert response.status_code == 200
+    assert response.json['filename'] == 'upload.mp3'
+
+def test_multipart_upload_keeps_extension_of_non_ascii_filename(client):
+    response = client.post('/api/upload', data={'audio': (io.BytesIO(b'audio'), '播.MP3')})
+    assert response.status_code == 200
+    assert response.json['filename'] == 'upload.mp3'